@@ -18,6 +18,13 @@ const MAX_AUTO_HEIGHT = 500;       // Maximum height for auto-resize
 const MIN_CONTENT_WIDTH = 300;     // Minimum content width
 const MIN_CONTENT_HEIGHT = 100;    // Minimum content height
 
+// Shown when switching to a view that was not rendered (precompute_both off)
+const VIEW_NOT_RENDERED_HTML = `<!DOCTYPE html><html><head><meta charset="UTF-8"></head>
+<body style="margin: 0; padding: 24px; text-align: center; background: #252526; color: #9d9d9d;
+font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; font-size: 12px;">
+This view was not rendered. Re-run the workflow (or enable precompute_both) to show it.
+</body></html>`;
+
 app.registerExtension({
     name: "textdiff.display",
 
@@ -52,10 +59,11 @@ app.registerExtension({
                         if (originalCallback) {
                             originalCallback.call(self, newValue);
                         }
-                        // Instant switch if we have both HTML versions
-                        if (self._htmlUnified && self._htmlSideBySide) {
+                        // Instant switch; with precompute_both off the other view
+                        // is missing, so show a re-run hint instead of the stale view
+                        if (self._htmlUnified || self._htmlSideBySide) {
                             const html = newValue === "unified" ? self._htmlUnified : self._htmlSideBySide;
-                            self.updateDiffDisplay(html, newValue, true); // skipResize=true
+                            self.updateDiffDisplay(html || VIEW_NOT_RENDERED_HTML, newValue, true); // skipResize=true
                             if (app.graph) {
                                 app.graph.setDirtyCanvas(true, false);
                             }
@@ -75,8 +83,9 @@ app.registerExtension({
 
             if (message && message.diff_html_unified && message.diff_html_side_by_side) {
                 // Store both HTML versions for instant view mode switching
-                this._htmlUnified = message.diff_html_unified[0];
-                this._htmlSideBySide = message.diff_html_side_by_side[0];
+                // (one is empty when precompute_both is off)
+                this._htmlUnified = message.diff_html_unified[0] || null;
+                this._htmlSideBySide = message.diff_html_side_by_side[0] || null;
 
                 const viewMode = message.view_mode ? message.view_mode[0] : "side_by_side";
                 const htmlContent = viewMode === "unified" ? this._htmlUnified : this._htmlSideBySide;
@@ -92,6 +101,12 @@ app.registerExtension({
                 onConfigure.apply(this, arguments);
             }
 
+            // Workflows saved before precompute_both existed have saved HTML in its slot
+            const precomputeWidget = this.widgets?.find(w => w.name === "precompute_both");
+            if (precomputeWidget && typeof precomputeWidget.value !== "boolean") {
+                precomputeWidget.value = true;
+            }
+
             // Find saved HTML entries in widgets_values (unified first, then side_by_side)
             const htmlEntries = [];
             if (this.widgets_values) {
@@ -1,8 +1,23 @@
 """TextDiff node for comparing two text strings with GitHub-style highlighting."""
 
-from typing import Any, Dict, List, Optional
+import functools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
-from ..utils import compute_text_diff, format_diff_html
+from ..utils import DiffResult, compute_text_diff, format_diff_html, format_diff_html_both
+
+# Rendered HTML is kept for this many recent input combinations; inputs with
+# a combined length of this many characters or more are never cached. This is
+# the only cache keyed on the input texts. Each entry holds the inputs plus
+# HTML several times their size, so only the latest runs are kept (two, so
+# toggling view_mode with precompute_both off does not recompute).
+HTML_CACHE_SIZE = 2
+HTML_CACHE_MAX_CHARS = 1_000_000
+
+# On free-threaded Python, diffs with more lines than this render the two
+# views in parallel threads (with the GIL, the single fused pass is faster)
+PARALLEL_FORMAT_MIN_LINES = 500
 
 
 class TextDiff:
@@ -25,6 +40,12 @@ class TextDiff:
                     {"default": -1, "min": -1, "max": 50, "step": 1,
                      "tooltip": "Lines of context around changes (-1 = show all)"},
                 ),
+                "precompute_both": (
+                    "BOOLEAN",
+                    {"default": True,
+                     "tooltip": "Generate both views for instant view mode switching "
+                                "(off = only the selected view, faster on large diffs)"},
+                ),
             },
             "hidden": {
                 "unique_id": "UNIQUE_ID",
@@ -43,6 +64,7 @@ class TextDiff:
         text_b: str,
         view_mode: str = "side_by_side",
         context_lines: int = -1,
+        precompute_both: bool = True,
         unique_id: Optional[str] = None,
         extra_pnginfo: Optional[List[Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
@@ -54,6 +76,8 @@ class TextDiff:
             text_b: The second (modified) text string
             view_mode: Display mode - 'unified' or 'side_by_side'
             context_lines: Number of context lines around changes (-1 = show all)
+            precompute_both: Generate both views; if False, only view_mode is
+                generated and the other HTML is an empty string
             unique_id: ComfyUI node unique identifier
             extra_pnginfo: ComfyUI workflow metadata
 
@@ -63,12 +87,10 @@ class TextDiff:
                 - diff_html_side_by_side: List with side-by-side view HTML
                 - view_mode: List with selected view mode
         """
-        # Compute the diff
-        diff_result = compute_text_diff(text_a, text_b, context_lines)
-
-        # Generate BOTH HTML versions for instant view mode switching
-        html_unified = format_diff_html(diff_result, "unified")
-        html_side_by_side = format_diff_html(diff_result, "side_by_side")
+        # Compute the diff and generate HTML (both versions for instant view mode switching)
+        html_unified, html_side_by_side = _render_diff_html(
+            text_a, text_b, context_lines, view_mode, precompute_both
+        )
 
         # Persist to workflow for reload (silently handle errors to avoid breaking execution)
         if unique_id is not None and extra_pnginfo is not None:
@@ -113,9 +135,12 @@ class TextDiff:
                         v for v in widgets_values
                         if not (isinstance(v, str) and v.startswith("<!DOCTYPE"))
                     ]
-                    # Append both HTML versions (unified first, then side_by_side)
-                    widgets_values.append(html_unified)
-                    widgets_values.append(html_side_by_side)
+                    # Append the HTML versions (unified first, then side_by_side);
+                    # a view that was not generated is skipped
+                    if html_unified:
+                        widgets_values.append(html_unified)
+                    if html_side_by_side:
+                        widgets_values.append(html_side_by_side)
                     node["widgets_values"] = widgets_values
                 break
 
@@ -123,3 +148,49 @@ class TextDiff:
     def IS_CHANGED(cls, **kwargs):
         """Force re-execution when inputs change."""
         return float("nan")
+
+
+def _render_diff_html(
+    text_a: str, text_b: str, context_lines: int, view_mode: str, precompute_both: bool
+) -> Tuple[str, str]:
+    """
+    Compute the diff and return (unified_html, side_by_side_html).
+
+    When precompute_both is False only view_mode is rendered and the other
+    string is empty. Results for inputs below HTML_CACHE_MAX_CHARS are
+    reused across executions with unchanged inputs.
+    """
+    # view_mode only affects the output when a single view is rendered
+    selected_view = None if precompute_both else view_mode
+    if len(text_a) + len(text_b) < HTML_CACHE_MAX_CHARS:
+        return _render_diff_html_cached(text_a, text_b, context_lines, selected_view)
+    return _render_diff_html_uncached(text_a, text_b, context_lines, selected_view)
+
+
+def _render_diff_html_uncached(
+    text_a: str, text_b: str, context_lines: int, selected_view: Optional[str]
+) -> Tuple[str, str]:
+    """Render the diff HTML without caching (selected_view None = both views)."""
+    diff_result = compute_text_diff(text_a, text_b, context_lines)
+    if selected_view is None:
+        return _format_both_views(diff_result)
+    if selected_view == "unified":
+        return format_diff_html(diff_result, "unified"), ""
+    return "", format_diff_html(diff_result, "side_by_side")
+
+
+_render_diff_html_cached = functools.lru_cache(maxsize=HTML_CACHE_SIZE)(
+    _render_diff_html_uncached
+)
+
+
+def _format_both_views(diff_result: DiffResult) -> Tuple[str, str]:
+    """Render both views, in two threads when that can actually run in parallel."""
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    if gil_enabled or len(diff_result) <= PARALLEL_FORMAT_MIN_LINES:
+        return format_diff_html_both(diff_result)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        unified = executor.submit(format_diff_html, diff_result, "unified")
+        side_by_side = executor.submit(format_diff_html, diff_result, "side_by_side")
+        return unified.result(), side_by_side.result()
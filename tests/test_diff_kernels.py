@@ -0,0 +1,107 @@
+"""
+Randomized checks for the line- and word-level diff kernels.
+
+Run from the repository root with: python -m unittest discover -s tests
+"""
+
+import difflib
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils._char_diff_numba import NUMBA_AVAILABLE  # noqa: E402
+from utils.myers import common_affixes, myers_opcodes  # noqa: E402
+
+if NUMBA_AVAILABLE:
+    from utils._char_diff_numba import token_opcodes  # noqa: E402
+
+
+def _random_pair(rng, max_len=30):
+    """Two random sequences over a small alphabet, so matches are frequent."""
+    alphabet = rng.randint(1, 5)
+    a = [rng.randint(0, alphabet) for _ in range(rng.randint(0, max_len))]
+    b = [rng.randint(0, alphabet) for _ in range(rng.randint(0, max_len))]
+    return a, b
+
+
+def _lcs_length(a, b):
+    """Length of the longest common subsequence (quadratic DP)."""
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        cur = [0]
+        for j, y in enumerate(b):
+            cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+        prev = cur
+    return prev[-1]
+
+
+class TestMyersOpcodes(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(1234)
+
+    def assertValidOpcodes(self, opcodes, a, b):
+        """Opcodes must tile both sequences in order and turn a into b."""
+        i = j = 0
+        rebuilt = []
+        for tag, i1, i2, j1, j2 in opcodes:
+            self.assertEqual((i1, j1), (i, j))
+            if tag == "equal":
+                self.assertEqual(a[i1:i2], b[j1:j2])
+            else:
+                self.assertIn(tag, ("replace", "delete", "insert"))
+                self.assertEqual(i1 == i2, tag == "insert")
+                self.assertEqual(j1 == j2, tag == "delete")
+            rebuilt.extend(b[j1:j2])
+            i, j = i2, j2
+        self.assertEqual((i, j), (len(a), len(b)))
+        self.assertEqual(rebuilt, b)
+
+    def test_valid_and_minimal(self):
+        for _ in range(2000):
+            a, b = _random_pair(self.rng)
+            opcodes = myers_opcodes(a, b)
+            self.assertValidOpcodes(opcodes, a, b)
+            edits = sum(i2 - i1 + j2 - j1 for tag, i1, i2, j1, j2 in opcodes if tag != "equal")
+            self.assertEqual(edits, len(a) + len(b) - 2 * _lcs_length(a, b))
+
+    def test_max_edits(self):
+        for _ in range(2000):
+            a, b = _random_pair(self.rng)
+            max_edits = self.rng.randint(0, 20)
+            prefix, suffix = common_affixes(a, b)
+            mid_a = a[prefix:len(a) - suffix]
+            mid_b = b[prefix:len(b) - suffix]
+            depth = len(mid_a) + len(mid_b) - 2 * _lcs_length(mid_a, mid_b)
+            opcodes = myers_opcodes(a, b, max_edits)
+            if mid_a and mid_b and depth > max_edits:
+                self.assertIsNone(opcodes)
+            else:
+                self.assertIsNotNone(opcodes)
+                self.assertValidOpcodes(opcodes, a, b)
+
+    def test_pure_insertion_ignores_max_edits(self):
+        a = list(range(100))
+        b = a[:50] + [-1] * 500 + a[50:]
+        self.assertEqual(
+            myers_opcodes(a, b, max_edits=0),
+            [("equal", 0, 50, 0, 50), ("insert", 50, 50, 50, 550), ("equal", 50, 100, 550, 600)],
+        )
+
+
+@unittest.skipUnless(NUMBA_AVAILABLE, "numba is not installed")
+class TestTokenOpcodes(unittest.TestCase):
+    def test_matches_difflib(self):
+        rng = random.Random(5678)
+        for _ in range(5000):
+            a, b = _random_pair(rng)
+            tokens_a = [str(x) for x in a]
+            tokens_b = [str(x) for x in b]
+            expected = difflib.SequenceMatcher(None, tokens_a, tokens_b, autojunk=False).get_opcodes()
+            self.assertEqual([tuple(op) for op in token_opcodes(tokens_a, tokens_b)], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,4 @@
 from .diff_engine import compute_text_diff, DiffResult, DiffLine
-from .html_formatter import format_diff_html
+from .html_formatter import format_diff_html, format_diff_html_both
 
-__all__ = ["compute_text_diff", "DiffResult", "DiffLine", "format_diff_html"]
+__all__ = ["compute_text_diff", "DiffResult", "DiffLine", "format_diff_html", "format_diff_html_both"]
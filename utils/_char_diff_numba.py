@@ -0,0 +1,139 @@
+"""
+Optional Numba-accelerated kernel for word-level diffs.
+
+When numba and numpy are installed, compute_char_diff maps tokens to int32
+ids and runs a compiled version of difflib.SequenceMatcher's longest-match
+search, producing the same opcodes. Without them, or if compilation fails,
+NUMBA_AVAILABLE is False and difflib is used directly.
+"""
+
+from typing import Dict, List, Sequence
+
+from .myers import Opcode, opcodes_from_blocks
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    NUMBA_AVAILABLE = False
+else:
+    NUMBA_AVAILABLE = True
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True)
+    def matching_blocks(a, b):
+        """
+        Matching blocks of two int32 arrays, identical to
+        SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks()
+        without the trailing sentinel.
+
+        Returns:
+            (k, 3) int32 array of ascending (i, j, size) matching blocks
+        """
+        n = a.shape[0]
+        m = b.shape[0]
+        limit = min(n, m)
+        found = np.empty((limit + 1, 3), np.int32)
+        count = 0
+        # Pending (alo, ahi, blo, bhi) ranges; each match pushes at most two
+        stack = np.empty((2 * limit + 2, 4), np.int32)
+        stack[0, 0] = 0
+        stack[0, 1] = n
+        stack[0, 2] = 0
+        stack[0, 3] = m
+        depth = 1
+        # prev[j + 1] and cur[j + 1] hold the length of the match ending at
+        # (i - 1, j) and (i, j); the rows are swapped after each i
+        prev = np.zeros(m + 1, np.int32)
+        cur = np.zeros(m + 1, np.int32)
+        while depth > 0:
+            depth -= 1
+            alo = stack[depth, 0]
+            ahi = stack[depth, 1]
+            blo = stack[depth, 2]
+            bhi = stack[depth, 3]
+
+            # find_longest_match: longest block, then lowest i, then lowest j
+            best_i = alo
+            best_j = blo
+            best_size = 0
+            prev[blo:bhi + 1] = 0
+            for i in range(alo, ahi):
+                cur[blo] = 0
+                ai = a[i]
+                for j in range(blo, bhi):
+                    if ai == b[j]:
+                        k = prev[j] + 1
+                        cur[j + 1] = k
+                        if k > best_size:
+                            best_i = i - k + 1
+                            best_j = j - k + 1
+                            best_size = k
+                    else:
+                        cur[j + 1] = 0
+                prev, cur = cur, prev
+
+            if best_size > 0:
+                found[count, 0] = best_i
+                found[count, 1] = best_j
+                found[count, 2] = best_size
+                count += 1
+                if alo < best_i and blo < best_j:
+                    stack[depth, 0] = alo
+                    stack[depth, 1] = best_i
+                    stack[depth, 2] = blo
+                    stack[depth, 3] = best_j
+                    depth += 1
+                if best_i + best_size < ahi and best_j + best_size < bhi:
+                    stack[depth, 0] = best_i + best_size
+                    stack[depth, 1] = ahi
+                    stack[depth, 2] = best_j + best_size
+                    stack[depth, 3] = bhi
+                    depth += 1
+
+        # Sort by position and merge adjacent blocks, as difflib does
+        order = np.argsort(found[:count, 0])
+        blocks = np.empty((count, 3), np.int32)
+        merged = 0
+        for r in range(count):
+            i = found[order[r], 0]
+            j = found[order[r], 1]
+            size = found[order[r], 2]
+            if (
+                merged > 0
+                and blocks[merged - 1, 0] + blocks[merged - 1, 2] == i
+                and blocks[merged - 1, 1] + blocks[merged - 1, 2] == j
+            ):
+                blocks[merged - 1, 2] += size
+            else:
+                blocks[merged, 0] = i
+                blocks[merged, 1] = j
+                blocks[merged, 2] = size
+                merged += 1
+        return blocks[:merged]
+
+    def token_opcodes(old_tokens: Sequence[str], new_tokens: Sequence[str]) -> List[Opcode]:
+        """Compute SequenceMatcher-style opcodes between two token lists."""
+        ids: Dict[str, int] = {}
+        ids_a = np.fromiter(
+            (ids.setdefault(t, len(ids)) for t in old_tokens), dtype=np.int32, count=len(old_tokens)
+        )
+        ids_b = np.fromiter(
+            (ids.setdefault(t, len(ids)) for t in new_tokens), dtype=np.int32, count=len(new_tokens)
+        )
+        blocks = matching_blocks(ids_a, ids_b)
+        return opcodes_from_blocks(blocks.tolist(), len(old_tokens), len(new_tokens))
+
+    # Compile (or load from cache) at import so the first diff is not delayed.
+    # A cache written under another module name (e.g. before the node folder
+    # was renamed) fails to load, so retry with an uncached compile first.
+    try:
+        matching_blocks(np.zeros(1, np.int32), np.ones(1, np.int32))
+    except Exception:
+        matching_blocks = njit(matching_blocks.py_func)
+        try:
+            matching_blocks(np.zeros(1, np.int32), np.ones(1, np.int32))
+        except Exception:
+            NUMBA_AVAILABLE = False
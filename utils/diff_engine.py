@@ -1,38 +1,137 @@
 """
 Diff engine for computing line-level and character-level text differences.
 
-Uses Python's built-in difflib module for robust diff computation.
+Uses Python's built-in difflib module for robust diff computation, with a
+Myers diff (see myers.py) for line-level matching of large inputs.
 Line numbers are 1-based in all outputs.
 """
 
 import difflib
+import functools
 import re
+import sys
+from array import array
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
-# Regex pattern to split text into words and whitespace tokens
-WHITESPACE_SPLIT_PATTERN = r'(\s+)'
+from ._char_diff_numba import NUMBA_AVAILABLE
+from .myers import Opcode, common_affixes, myers_opcodes
+
+if NUMBA_AVAILABLE:
+    from ._char_diff_numba import token_opcodes
+
+# Splits a line into word and whitespace runs (never yields empty tokens)
+_TOKEN_RE = re.compile(r"\S+|\s+")
+
+# Line-level matching: inputs shorter than this use difflib.SequenceMatcher;
+# larger ones use Myers diff, falling back to SequenceMatcher when the search
+# over the differing middle section would exceed depth MYERS_MAX_EDITS
+MYERS_MIN_LINES = 200
+MYERS_MAX_EDITS = 1000
+
+# Character-diff memoization: number of cached line pairs, and the combined
+# length above which a pair is diffed without caching (avoids huge cache keys)
+CHAR_DIFF_CACHE_SIZE = 4096
+CHAR_DIFF_CACHE_MAX_CHARS = 8192
+
+# Paired lines longer than this, or with very different lengths, skip the
+# word-level diff and are shown as a whole-line delete + insert
+CHAR_DIFF_MAX_LINE_LENGTH = 2000
+
+
+# Per-line change codes stored in DiffResult.change_types; small consecutive
+# ints so they can index lookup tuples directly
+CHANGE_UNCHANGED = 0
+CHANGE_ADDED = 1
+CHANGE_DELETED = 2
+
+# DiffLine.change_type names, indexed by CHANGE_* code
+_CHANGE_TYPE_NAMES = (sys.intern("unchanged"), sys.intern("added"), sys.intern("deleted"))
+
+# Tags of char_diffs entries; interned so the formatter's comparisons hit
+# the identity fast path of str equality
+CHAR_EQUAL = sys.intern("equal")
+CHAR_DELETE = sys.intern("delete")
+CHAR_INSERT = sys.intern("insert")
 
 
-@dataclass
 class DiffLine:
-    """Represents a single line in the diff output."""
+    """
+    Represents a single line in the diff output.
+
+    Uses __slots__ rather than @dataclass(slots=True) to stay compatible
+    with Python 3.9.
+    """
+
+    __slots__ = ("line_num_a", "line_num_b", "content", "change_type", "char_diffs", "is_paired")
 
-    line_num_a: Optional[int]  # Line number in text_a (None if addition)
-    line_num_b: Optional[int]  # Line number in text_b (None if deletion)
-    content: str
-    change_type: str  # 'unchanged', 'added', 'deleted'
-    char_diffs: Optional[List[Tuple[str, str]]] = None  # (change_type, text) pairs
-    is_paired: bool = False  # True only for lines from replace opcode (paired with another line)
+    def __init__(
+        self,
+        line_num_a: Optional[int],
+        line_num_b: Optional[int],
+        content: str,
+        change_type: str,
+        char_diffs: Optional[List[Tuple[str, str]]] = None,
+        is_paired: bool = False,
+    ):
+        self.line_num_a = line_num_a  # Line number in text_a (None if addition)
+        self.line_num_b = line_num_b  # Line number in text_b (None if deletion)
+        self.content = content
+        self.change_type = change_type  # 'unchanged', 'added', 'deleted'
+        self.char_diffs = char_diffs  # (change_type, text) pairs
+        self.is_paired = is_paired  # True only for lines from replace opcode (paired with another line)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"DiffLine({fields})"
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None  # Mutable and compared by value, like the former dataclass
 
 
 @dataclass
 class DiffResult:
-    """Contains the complete diff result with lines and statistics."""
+    """
+    Contains the complete diff result with lines and statistics.
 
-    lines: List[DiffLine] = field(default_factory=list)
+    Line fields are stored as parallel arrays indexed by diff line, so the
+    formatters read only the fields they need; `lines` provides DiffLine
+    views for callers that want one object per line.
+    """
+
+    line_num_a: array = field(default_factory=lambda: array("i"))  # -1 if addition
+    line_num_b: array = field(default_factory=lambda: array("i"))  # -1 if deletion
+    contents: List[str] = field(default_factory=list)
+    change_types: bytes = b""  # One CHANGE_* code per line
+    char_diffs: List[Optional[List[Tuple[str, str]]]] = field(default_factory=list)
+    paired: bytes = b""  # 1 for lines from a replace opcode, else 0
     stats: dict = field(default_factory=lambda: {"additions": 0, "deletions": 0, "unchanged": 0})
 
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    @property
+    def lines(self) -> List[DiffLine]:
+        """Build DiffLine views of all lines (a new list on each access)."""
+        return [
+            DiffLine(
+                line_num_a=num_a if num_a >= 0 else None,
+                line_num_b=num_b if num_b >= 0 else None,
+                content=content,
+                change_type=_CHANGE_TYPE_NAMES[change_type],
+                char_diffs=char_diffs,
+                is_paired=bool(paired),
+            )
+            for num_a, num_b, content, change_type, char_diffs, paired in zip(
+                self.line_num_a, self.line_num_b, self.contents,
+                self.change_types, self.char_diffs, self.paired,
+            )
+        ]
+
 
 def compute_text_diff(
     text_a: str, text_b: str, context_lines: int = 3
@@ -40,8 +139,9 @@ def compute_text_diff(
     """
     Compute line-by-line diff with character-level highlighting for changed lines.
 
-    Uses difflib.SequenceMatcher for line-level comparison, then applies
-    character-level diff for modified (replaced) lines.
+    Uses difflib.SequenceMatcher (or Myers diff for large inputs) for
+    line-level comparison, then applies character-level diff for modified
+    (replaced) lines.
 
     Args:
         text_a: The original text
@@ -51,25 +151,21 @@ def compute_text_diff(
     Returns:
         DiffResult containing all diff lines and statistics
     """
-    # Handle edge cases
-    if text_a == text_b:
-        lines = text_a.splitlines(keepends=True)
-        diff_lines = [
-            DiffLine(
-                line_num_a=i + 1,
-                line_num_b=i + 1,
-                content=line,
-                change_type="unchanged",
-                char_diffs=None,
-            )
-            for i, line in enumerate(lines)
-        ]
+    lines_a = text_a.splitlines(keepends=True)
+
+    # Handle edge cases (identical inputs reuse the single split of text_a)
+    if len(text_a) == len(text_b) and text_a == text_b:
+        count = len(lines_a)
         return DiffResult(
-            lines=diff_lines,
-            stats={"additions": 0, "deletions": 0, "unchanged": len(lines)},
+            line_num_a=array("i", range(1, count + 1)),
+            line_num_b=array("i", range(1, count + 1)),
+            contents=lines_a,
+            change_types=bytes((CHANGE_UNCHANGED,)) * count,
+            char_diffs=[None] * count,
+            paired=bytes(count),
+            stats={"additions": 0, "deletions": 0, "unchanged": count},
         )
 
-    lines_a = text_a.splitlines(keepends=True)
     lines_b = text_b.splitlines(keepends=True)
 
     # Handle empty inputs
@@ -83,27 +179,26 @@ def compute_text_diff(
     elif not lines_b:
         lines_b = [text_b]
 
-    # Use SequenceMatcher for matching blocks
-    # autojunk=False ensures accurate diffs (no heuristic skipping of "junk" elements)
-    matcher = difflib.SequenceMatcher(None, lines_a, lines_b, autojunk=False)
-    diff_lines: List[DiffLine] = []
+    nums_a = array("i")
+    nums_b = array("i")
+    contents: List[str] = []
+    change_types = bytearray()
+    char_diffs_list: List[Optional[List[Tuple[str, str]]]] = []
+    paired = bytearray()
 
     stats = {"additions": 0, "deletions": 0, "unchanged": 0}
 
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+    for tag, i1, i2, j1, j2 in _line_opcodes(lines_a, lines_b):
         if tag == "equal":
             # Unchanged lines
-            for idx, line in enumerate(lines_a[i1:i2]):
-                diff_lines.append(
-                    DiffLine(
-                        line_num_a=i1 + idx + 1,
-                        line_num_b=j1 + idx + 1,
-                        content=line,
-                        change_type="unchanged",
-                        char_diffs=None,
-                    )
-                )
-                stats["unchanged"] += 1
+            count = i2 - i1
+            nums_a.extend(range(i1 + 1, i2 + 1))
+            nums_b.extend(range(j1 + 1, j2 + 1))
+            contents.extend(lines_a[i1:i2])
+            change_types.extend(bytes((CHANGE_UNCHANGED,)) * count)
+            char_diffs_list.extend([None] * count)
+            paired.extend(bytes(count))
+            stats["unchanged"] += count
 
         elif tag == "replace":
             # Modified lines - compute character-level diffs
@@ -116,111 +211,183 @@ def compute_text_diff(
                 old_line = old_lines[idx] if idx < len(old_lines) else ""
                 new_line = new_lines[idx] if idx < len(new_lines) else ""
 
-                # Compute character-level diff for this pair
-                char_diffs = compute_char_diff(old_line, new_line)
+                # Compute character-level diff for this pair (identical pairs need none)
+                if old_line == new_line:
+                    char_diffs = None
+                elif old_line and new_line and _char_diff_too_costly(old_line, new_line):
+                    char_diffs = [(CHAR_DELETE, old_line), (CHAR_INSERT, new_line)]
+                else:
+                    char_diffs = compute_char_diff(old_line, new_line)
 
                 if old_line:
-                    diff_lines.append(
-                        DiffLine(
-                            line_num_a=i1 + idx + 1 if idx < len(old_lines) else None,
-                            line_num_b=None,
-                            content=old_line,
-                            change_type="deleted",
-                            char_diffs=char_diffs,
-                            is_paired=True,
-                        )
-                    )
+                    nums_a.append(i1 + idx + 1)
+                    nums_b.append(-1)
+                    contents.append(old_line)
+                    change_types.append(CHANGE_DELETED)
+                    char_diffs_list.append(char_diffs)
+                    paired.append(1)
                     stats["deletions"] += 1
 
                 if new_line:
-                    diff_lines.append(
-                        DiffLine(
-                            line_num_a=None,
-                            line_num_b=j1 + idx + 1 if idx < len(new_lines) else None,
-                            content=new_line,
-                            change_type="added",
-                            char_diffs=char_diffs,
-                            is_paired=True,
-                        )
-                    )
+                    nums_a.append(-1)
+                    nums_b.append(j1 + idx + 1)
+                    contents.append(new_line)
+                    change_types.append(CHANGE_ADDED)
+                    char_diffs_list.append(char_diffs)
+                    paired.append(1)
                     stats["additions"] += 1
 
         elif tag == "delete":
             # Lines only in text_a
-            for idx, line in enumerate(lines_a[i1:i2]):
-                diff_lines.append(
-                    DiffLine(
-                        line_num_a=i1 + idx + 1,
-                        line_num_b=None,
-                        content=line,
-                        change_type="deleted",
-                        char_diffs=None,
-                    )
-                )
-                stats["deletions"] += 1
+            count = i2 - i1
+            nums_a.extend(range(i1 + 1, i2 + 1))
+            nums_b.extend([-1] * count)
+            contents.extend(lines_a[i1:i2])
+            change_types.extend(bytes((CHANGE_DELETED,)) * count)
+            char_diffs_list.extend([None] * count)
+            paired.extend(bytes(count))
+            stats["deletions"] += count
 
         elif tag == "insert":
             # Lines only in text_b
-            for idx, line in enumerate(lines_b[j1:j2]):
-                diff_lines.append(
-                    DiffLine(
-                        line_num_a=None,
-                        line_num_b=j1 + idx + 1,
-                        content=line,
-                        change_type="added",
-                        char_diffs=None,
-                    )
-                )
-                stats["additions"] += 1
-
-    # Apply context line filtering
+            count = j2 - j1
+            nums_a.extend([-1] * count)
+            nums_b.extend(range(j1 + 1, j2 + 1))
+            contents.extend(lines_b[j1:j2])
+            change_types.extend(bytes((CHANGE_ADDED,)) * count)
+            char_diffs_list.extend([None] * count)
+            paired.extend(bytes(count))
+            stats["additions"] += count
+
+    result = DiffResult(
+        line_num_a=nums_a,
+        line_num_b=nums_b,
+        contents=contents,
+        change_types=bytes(change_types),
+        char_diffs=char_diffs_list,
+        paired=bytes(paired),
+        stats=stats,
+    )
+
+    # Apply context line filtering (stats are recounted for the kept lines)
     if context_lines >= 0:
-        diff_lines = _filter_context_lines(diff_lines, context_lines)
-        # Recalculate stats after filtering
-        stats = {"additions": 0, "deletions": 0, "unchanged": 0}
-        for line in diff_lines:
-            if line.change_type == "added":
-                stats["additions"] += 1
-            elif line.change_type == "deleted":
-                stats["deletions"] += 1
-            else:
-                stats["unchanged"] += 1
+        result = _filter_context_lines(result, context_lines)
+
+    return result
+
+
+def _char_diff_too_costly(old_line: str, new_line: str) -> bool:
+    """Check whether a line pair is too long or too dissimilar for a word-level diff."""
+    old_len = len(old_line)
+    new_len = len(new_line)
+    return (
+        old_len > CHAR_DIFF_MAX_LINE_LENGTH
+        or new_len > CHAR_DIFF_MAX_LINE_LENGTH
+        or abs(old_len - new_len) > 4 * min(old_len, new_len) + 32
+    )
+
+
+def _line_opcodes(lines_a: Sequence[str], lines_b: Sequence[str]) -> List[Opcode]:
+    """
+    Compute line-level opcodes in difflib.SequenceMatcher.get_opcodes() format.
 
-    return DiffResult(lines=diff_lines, stats=stats)
+    Large inputs are matched with Myers diff over interned line ids, which
+    stays near-linear for typical edits where SequenceMatcher degrades on
+    repeated lines. Small or heavily rewritten inputs use SequenceMatcher.
+    """
+    if max(len(lines_a), len(lines_b)) >= MYERS_MIN_LINES:
+        ids: Dict[str, int] = {}
+        ids_a = [ids.setdefault(line, len(ids)) for line in lines_a]
+        ids_b = [ids.setdefault(line, len(ids)) for line in lines_b]
+
+        # Within the middle section left after trimming the common prefix and
+        # suffix, lines present on only one side are guaranteed edits; skip
+        # Myers early when they alone exceed the search depth. A pure
+        # insertion or deletion needs no search, so it is always attempted.
+        prefix, suffix = common_affixes(ids_a, ids_b)
+        mid_a = ids_a[prefix:len(ids_a) - suffix]
+        mid_b = ids_b[prefix:len(ids_b) - suffix]
+        min_edits = 0
+        if mid_a and mid_b:
+            set_a = set(mid_a)
+            set_b = set(mid_b)
+            min_edits = sum(1 for i in mid_a if i not in set_b)
+            min_edits += sum(1 for i in mid_b if i not in set_a)
+        if min_edits <= MYERS_MAX_EDITS:
+            opcodes = myers_opcodes(ids_a, ids_b, MYERS_MAX_EDITS)
+            if opcodes is not None:
+                return opcodes
+
+    # autojunk=False ensures accurate diffs (no heuristic skipping of "junk" elements)
+    matcher = difflib.SequenceMatcher(None, lines_a, lines_b, autojunk=False)
+    return matcher.get_opcodes()
 
 
-def _filter_context_lines(diff_lines: List[DiffLine], context_lines: int) -> List[DiffLine]:
+def _filter_context_lines(diff_result: DiffResult, context_lines: int) -> DiffResult:
     """
     Filter diff lines to only show changed lines and surrounding context.
 
     Args:
-        diff_lines: Full list of diff lines
+        diff_result: Diff result holding the full list of diff lines
         context_lines: Number of unchanged lines to keep around changes
 
     Returns:
-        Filtered list with only relevant lines
+        Filtered DiffResult with stats counted over the kept lines
     """
-    if not diff_lines:
-        return diff_lines
-
-    # Find indices of all changed lines
-    changed_indices = {
-        i for i, line in enumerate(diff_lines)
-        if line.change_type != "unchanged"
-    }
+    change_types = diff_result.change_types
+    count = len(change_types)
+    if not count or change_types.count(CHANGE_UNCHANGED) == count:
+        return diff_result  # Nothing to filter, return all
+
+    # Forward sweep: distance from each line back to the nearest change
+    dist_prev = [0] * count
+    last_change = -(count + context_lines + 1)
+    for i, change_type in enumerate(change_types):
+        if change_type != CHANGE_UNCHANGED:
+            last_change = i
+        dist_prev[i] = i - last_change
+
+    # Backward sweep: keep lines within context_lines of a change on either side
+    included: List[int] = []
+    additions = deletions = unchanged = 0
+    next_change = 2 * count + context_lines + 1
+    for i in range(count - 1, -1, -1):
+        change_type = change_types[i]
+        if change_type != CHANGE_UNCHANGED:
+            next_change = i
+        if dist_prev[i] <= context_lines or next_change - i <= context_lines:
+            included.append(i)
+            if change_type == CHANGE_ADDED:
+                additions += 1
+            elif change_type == CHANGE_DELETED:
+                deletions += 1
+            else:
+                unchanged += 1
+    included.reverse()
 
-    if not changed_indices:
-        return diff_lines  # No changes, return all
+    stats = {"additions": additions, "deletions": deletions, "unchanged": unchanged}
+    return _select_lines(diff_result, included, stats)
 
-    # Include lines within context_lines distance of any change
-    included = set()
-    for idx in changed_indices:
-        for offset in range(-context_lines, context_lines + 1):
-            target = idx + offset
-            if 0 <= target < len(diff_lines):
-                included.add(target)
 
-    return [line for i, line in enumerate(diff_lines) if i in included]
+def _select_lines(
+    diff_result: DiffResult, indices: List[int], stats: Dict[str, int]
+) -> DiffResult:
+    """Build a DiffResult of only the lines at the given ascending indices."""
+    nums_a = diff_result.line_num_a
+    nums_b = diff_result.line_num_b
+    contents = diff_result.contents
+    change_types = diff_result.change_types
+    char_diffs = diff_result.char_diffs
+    paired = diff_result.paired
+    return DiffResult(
+        line_num_a=array("i", [nums_a[i] for i in indices]),
+        line_num_b=array("i", [nums_b[i] for i in indices]),
+        contents=[contents[i] for i in indices],
+        change_types=bytes([change_types[i] for i in indices]),
+        char_diffs=[char_diffs[i] for i in indices],
+        paired=bytes([paired[i] for i in indices]),
+        stats=stats,
+    )
 
 
 def compute_char_diff(old_line: str, new_line: str) -> List[Tuple[str, str]]:
@@ -229,6 +396,8 @@ def compute_char_diff(old_line: str, new_line: str) -> List[Tuple[str, str]]:
 
     Tokenizes by words (preserving whitespace) and compares word-by-word
     for more readable diffs than character-by-character comparison.
+    Results for short line pairs are memoized, so the returned list may be
+    shared between callers and must be treated as read-only.
 
     Args:
         old_line: The original line
@@ -238,36 +407,51 @@ def compute_char_diff(old_line: str, new_line: str) -> List[Tuple[str, str]]:
         List of (change_type, text) tuples where change_type is one of:
         'equal', 'delete', 'insert'
     """
+    if len(old_line) + len(new_line) > CHAR_DIFF_CACHE_MAX_CHARS:
+        return _compute_char_diff_uncached(old_line, new_line)
+    return _compute_char_diff_cached(old_line, new_line)
+
+
+def _compute_char_diff_uncached(old_line: str, new_line: str) -> List[Tuple[str, str]]:
+    """Compute word-level differences between two lines without memoization."""
     if not old_line and not new_line:
         return []
 
     if not old_line:
-        return [("insert", new_line)]
+        return [(CHAR_INSERT, new_line)]
 
     if not new_line:
-        return [("delete", old_line)]
-
-    # Split into tokens (words and whitespace separately)
-    old_tokens = re.split(WHITESPACE_SPLIT_PATTERN, old_line)
-    new_tokens = re.split(WHITESPACE_SPLIT_PATTERN, new_line)
+        return [(CHAR_DELETE, old_line)]
 
-    # Filter out empty strings from split
-    old_tokens = [t for t in old_tokens if t]
-    new_tokens = [t for t in new_tokens if t]
+    if old_line == new_line:
+        return [(CHAR_EQUAL, old_line)]
 
-    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    # Split into tokens (words and whitespace separately)
+    old_tokens = _TOKEN_RE.findall(old_line)
+    new_tokens = _TOKEN_RE.findall(new_line)
+
+    if NUMBA_AVAILABLE:
+        opcodes = token_opcodes(old_tokens, new_tokens)
+    else:
+        matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+        opcodes = matcher.get_opcodes()
     result: List[Tuple[str, str]] = []
 
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+    for tag, i1, i2, j1, j2 in opcodes:
         if tag == "equal":
-            result.append(("equal", "".join(old_tokens[i1:i2])))
+            result.append((CHAR_EQUAL, "".join(old_tokens[i1:i2])))
         elif tag == "replace":
             # For replace, show both delete and insert
-            result.append(("delete", "".join(old_tokens[i1:i2])))
-            result.append(("insert", "".join(new_tokens[j1:j2])))
+            result.append((CHAR_DELETE, "".join(old_tokens[i1:i2])))
+            result.append((CHAR_INSERT, "".join(new_tokens[j1:j2])))
         elif tag == "delete":
-            result.append(("delete", "".join(old_tokens[i1:i2])))
+            result.append((CHAR_DELETE, "".join(old_tokens[i1:i2])))
         elif tag == "insert":
-            result.append(("insert", "".join(new_tokens[j1:j2])))
+            result.append((CHAR_INSERT, "".join(new_tokens[j1:j2])))
 
     return result
+
+
+_compute_char_diff_cached = functools.lru_cache(maxsize=CHAR_DIFF_CACHE_SIZE)(
+    _compute_char_diff_uncached
+)
@@ -6,9 +6,18 @@ unified and side-by-side diff views.
 """
 
 import html
-from typing import Dict, Optional, Union
-
-from .diff_engine import DiffResult, DiffLine
+import io
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .diff_engine import (
+    CHANGE_ADDED,
+    CHANGE_DELETED,
+    CHANGE_UNCHANGED,
+    CHAR_DELETE,
+    CHAR_EQUAL,
+    CHAR_INSERT,
+    DiffResult,
+)
 
 # Theme color constants (dark theme matching ComfyUI interface)
 COLOR_BG_DARK = "#1e1e1e"
@@ -199,6 +208,34 @@ body {
 </style>
 """
 
+# Row templates (no indentation or newlines; whitespace between cells is not rendered)
+_ROW_UNIFIED = (
+    '<tr class="diff-line {}"><td class="line-num">{}</td><td class="line-num">{}</td>'
+    '<td class="diff-content">{}{}</td></tr>'
+)
+_ROW_SIDE_BY_SIDE = (
+    '<tr class="diff-line {}"><td class="line-num">{}</td><td class="{}"{}>{}</td>'
+    '<td class="line-num">{}</td><td class="{}"{}>{}</td></tr>'
+)
+# Row CSS class and unified-view prefix indicator, indexed by CHANGE_* code
+_ROW_CLASS = ("line-unchanged", "line-added", "line-deleted")
+_PREFIX = (
+    '<span class="prefix">&nbsp;</span>',
+    '<span class="prefix prefix-add">+</span>',
+    '<span class="prefix prefix-del">-</span>',
+)
+_TABLE_START = '<table class="diff-table"><tbody>'
+_TABLE_END = '</tbody></table>'
+
+# Document shell: everything before and after the body content, built once
+_HTML_HEAD = (
+    '<!DOCTYPE html><html><head><meta charset="UTF-8">{css}</head>'
+    '<body><div class="diff-container {view_class}">'
+)
+_HTML_HEAD_UNIFIED = _HTML_HEAD.format(css=DIFF_CSS, view_class="unified")
+_HTML_HEAD_SBS = _HTML_HEAD.format(css=DIFF_CSS, view_class="side-by-side")
+_HTML_TAIL = '</div></body></html>'
+
 
 def format_diff_html(diff_result: DiffResult, view_mode: str = "unified") -> str:
     """
@@ -216,53 +253,60 @@ def format_diff_html(diff_result: DiffResult, view_mode: str = "unified") -> str
     return format_unified_view(diff_result)
 
 
-def format_unified_view(diff_result: DiffResult) -> str:
+def format_diff_html_both(diff_result: DiffResult) -> Tuple[str, str]:
     """
-    Generate unified diff view (similar to git diff).
+    Generate both unified and side-by-side HTML in a single pass.
 
-    Shows all lines in a single column with +/- prefixes.
+    Each line's highlighted content is identical in both views, so it is
+    formatted once and shared between the two outputs.
+
+    Args:
+        diff_result: The computed diff result
+
+    Returns:
+        Tuple of (unified_html, side_by_side_html) document strings
     """
     stats = diff_result.stats
     header = _generate_header(stats)
 
     # Check for no changes
     if stats["additions"] == 0 and stats["deletions"] == 0:
-        return _generate_html_document(
-            f"""
-            {header}
-            <div class="no-changes">
-                <div class="no-changes-icon">&#10003;</div>
-                <div>No differences found</div>
-            </div>
-            """,
-            "unified",
+        return (
+            _generate_no_changes_document(header, "unified"),
+            _generate_no_changes_document(header, "side-by-side"),
         )
 
-    rows = []
-    for line in diff_result.lines:
-        row_class = _get_row_class(line.change_type)
-        line_num_a = line.line_num_a if line.line_num_a is not None else ""
-        line_num_b = line.line_num_b if line.line_num_b is not None else ""
-        content = _format_content_with_char_diffs(line)
-        prefix = _get_prefix(line.change_type)
-
-        rows.append(
-            f"""<tr class="diff-line {row_class}">
-                <td class="line-num">{line_num_a}</td>
-                <td class="line-num">{line_num_b}</td>
-                <td class="diff-content">{prefix}{content}</td>
-            </tr>"""
-        )
+    unified = _start_document("unified", header)
+    write_unified = unified.write
+    side_by_side = _start_document("side-by-side", header)
+    write_sbs = side_by_side.write
+    for unified_row, sbs_row in _iter_rows(diff_result):
+        write_unified(unified_row)
+        if sbs_row is not None:
+            write_sbs(sbs_row)
+
+    return _finish_document(unified), _finish_document(side_by_side)
+
+
+def format_unified_view(diff_result: DiffResult) -> str:
+    """
+    Generate unified diff view (similar to git diff).
 
-    table = f"""
-        <table class="diff-table">
-            <tbody>
-                {''.join(rows)}
-            </tbody>
-        </table>
+    Shows all lines in a single column with +/- prefixes.
     """
+    stats = diff_result.stats
+    header = _generate_header(stats)
+
+    # Check for no changes
+    if stats["additions"] == 0 and stats["deletions"] == 0:
+        return _generate_no_changes_document(header, "unified")
 
-    return _generate_html_document(f"{header}{table}", "unified")
+    buf = _start_document("unified", header)
+    write = buf.write
+    for row, _ in _iter_rows(diff_result, side_by_side=False):
+        write(row)
+
+    return _finish_document(buf)
 
 
 def format_side_by_side_view(diff_result: DiffResult) -> str:
@@ -276,90 +320,148 @@ def format_side_by_side_view(diff_result: DiffResult) -> str:
 
     # Check for no changes
     if stats["additions"] == 0 and stats["deletions"] == 0:
-        return _generate_html_document(
-            f"""
-            {header}
-            <div class="no-changes">
-                <div class="no-changes-icon">&#10003;</div>
-                <div>No differences found</div>
-            </div>
-            """,
-            "side-by-side",
-        )
+        return _generate_no_changes_document(header, "side-by-side")
+
+    buf = _start_document("side-by-side", header)
+    write = buf.write
+    for _, row in _iter_rows(diff_result, unified=False):
+        if row is not None:
+            write(row)
+
+    return _finish_document(buf)
+
 
-    # Group lines for side-by-side display
-    rows = []
+def _iter_rows(
+    diff_result: DiffResult, unified: bool = True, side_by_side: bool = True
+) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+    """
+    Yield (unified_row, side_by_side_row) pairs for every line of the diff.
+
+    Each line's highlighted content is formatted once and shared by both
+    views. A paired deletion and addition produce two unified rows but a
+    single side-by-side row, so the deletion yields None on that side.
+    Rows for a view that is not requested are always None.
+    """
+    nums_a = diff_result.line_num_a
+    nums_b = diff_result.line_num_b
+    contents = diff_result.contents
+    change_types = diff_result.change_types
+    char_diffs = diff_result.char_diffs
+    paired = diff_result.paired
+    count = len(contents)
+    escape_cache: Dict[int, str] = {}
     i = 0
-    lines = diff_result.lines
-
-    while i < len(lines):
-        line = lines[i]
-
-        if line.change_type == "unchanged":
-            # Unchanged line - show on both sides
-            content = _format_content_with_char_diffs(line)
-            rows.append(_create_side_by_side_row(
-                line.line_num_a, content,
-                line.line_num_b, content,
-                "line-unchanged"
-            ))
+
+    while i < count:
+        change_type = change_types[i]
+        content = _format_content_with_char_diffs(
+            contents[i], change_type, char_diffs[i], _escape_cache=escape_cache
+        )
+        unified_row = (
+            _create_unified_row(change_type, nums_a[i], nums_b[i], content) if unified else None
+        )
+        sbs_row = None
+
+        if change_type == CHANGE_UNCHANGED:
+            if side_by_side:
+                sbs_row = _create_side_by_side_row(
+                    nums_a[i], content,
+                    nums_b[i], content,
+                    "line-unchanged"
+                )
             i += 1
 
-        elif line.change_type == "deleted":
-            # Check if this is a paired line from a replace opcode AND next line is its pair
-            if (line.is_paired and
-                i + 1 < len(lines) and
-                lines[i + 1].change_type == "added" and
-                lines[i + 1].is_paired):
-                # Paired deletion and addition from same replace opcode
-                del_line = line
-                add_line = lines[i + 1]
-                left_content = _format_content_with_char_diffs(del_line, for_deleted=True)
-                right_content = _format_content_with_char_diffs(add_line, for_added=True)
-                rows.append(_create_side_by_side_row(
-                    del_line.line_num_a, left_content,
-                    add_line.line_num_b, right_content,
-                    "line-modified"
-                ))
+        elif change_type == CHANGE_DELETED:
+            if (paired[i] and
+                i + 1 < count and
+                change_types[i + 1] == CHANGE_ADDED and
+                paired[i + 1]):
+                # Paired deletion and addition share one side-by-side row
+                yield unified_row, None
+                add_content = _format_content_with_char_diffs(
+                    contents[i + 1], CHANGE_ADDED, char_diffs[i + 1], _escape_cache=escape_cache
+                )
+                if unified:
+                    unified_row = _create_unified_row(
+                        CHANGE_ADDED, nums_a[i + 1], nums_b[i + 1], add_content
+                    )
+                if side_by_side:
+                    sbs_row = _create_side_by_side_row(
+                        nums_a[i], content,
+                        nums_b[i + 1], add_content,
+                        "line-modified"
+                    )
                 i += 2
             else:
-                # Deletion only
-                content = _format_content_with_char_diffs(line, for_deleted=True)
-                rows.append(_create_side_by_side_row(
-                    line.line_num_a, content,
-                    "", "",
-                    "line-deleted"
-                ))
+                if side_by_side:
+                    sbs_row = _create_side_by_side_row(
+                        nums_a[i], content,
+                        -1, "",
+                        "line-deleted"
+                    )
                 i += 1
 
-        elif line.change_type == "added":
-            # Addition only (no paired deletion)
-            content = _format_content_with_char_diffs(line, for_added=True)
-            rows.append(_create_side_by_side_row(
-                "", "",
-                line.line_num_b, content,
-                "line-added"
-            ))
+        elif change_type == CHANGE_ADDED:
+            if side_by_side:
+                sbs_row = _create_side_by_side_row(
+                    -1, "",
+                    nums_b[i], content,
+                    "line-added"
+                )
             i += 1
 
         else:
             i += 1
 
-    table = f"""
-        <table class="diff-table">
-            <tbody>
-                {''.join(rows)}
-            </tbody>
-        </table>
+        yield unified_row, sbs_row
+
+
+def _create_unified_row(change_type: int, line_num_a: int, line_num_b: int, content: str) -> str:
+    """
+    Create a unified view table row.
+
+    Args:
+        change_type: CHANGE_* code of the line
+        line_num_a: Line number in text_a (-1 if none)
+        line_num_b: Line number in text_b (-1 if none)
+        content: Formatted HTML content for the line
+
+    Returns:
+        HTML string for the table row
+    """
+    return _ROW_UNIFIED.format(
+        _ROW_CLASS[change_type],
+        line_num_a if line_num_a >= 0 else "",
+        line_num_b if line_num_b >= 0 else "",
+        _PREFIX[change_type],
+        content,
+    )
+
+
+def _start_document(view_class: str, header: str) -> io.StringIO:
     """
+    Open a buffer holding the document head, header and table start.
 
-    return _generate_html_document(f"{header}{table}", "side-by-side")
+    Rows are written directly into the buffer; _finish_document closes it.
+    """
+    buf = io.StringIO()
+    buf.write(_document_head(view_class))
+    buf.write(header)
+    buf.write(_TABLE_START)
+    return buf
+
+
+def _finish_document(buf: io.StringIO) -> str:
+    """Close the table and document opened by _start_document and return the HTML."""
+    buf.write(_TABLE_END)
+    buf.write(_HTML_TAIL)
+    return buf.getvalue()
 
 
 def _create_side_by_side_row(
-    left_num: Union[int, str],
+    left_num: int,
     left_content: str,
-    right_num: Union[int, str],
+    right_num: int,
     right_content: str,
     row_class: str
 ) -> str:
@@ -367,9 +469,9 @@ def _create_side_by_side_row(
     Create a side-by-side table row with left and right columns.
 
     Args:
-        left_num: Line number for left side (or empty string)
+        left_num: Line number for left side (-1 if none)
         left_content: HTML content for left side
-        right_num: Line number for right side (or empty string)
+        right_num: Line number for right side (-1 if none)
         right_content: HTML content for right side
         row_class: CSS class for the row (line-unchanged, line-modified, etc.)
 
@@ -379,9 +481,9 @@ def _create_side_by_side_row(
     left_cell_class = "diff-content left"
     right_cell_class = "diff-content right"
 
-    if not left_content and left_num == "":
+    if not left_content and left_num < 0:
         left_cell_class += " empty-cell"
-    if not right_content and right_num == "":
+    if not right_content and right_num < 0:
         right_cell_class += " empty-cell"
 
     # Add background colors for modified rows (dark theme)
@@ -392,12 +494,11 @@ def _create_side_by_side_row(
     if row_class == "line-added" or row_class == "line-modified":
         right_bg = ' style="background-color: #1e3a1e;"'
 
-    return f"""<tr class="diff-line {row_class}">
-        <td class="line-num">{left_num}</td>
-        <td class="{left_cell_class}"{left_bg}>{left_content}</td>
-        <td class="line-num">{right_num}</td>
-        <td class="{right_cell_class}"{right_bg}>{right_content}</td>
-    </tr>"""
+    return _ROW_SIDE_BY_SIDE.format(
+        row_class,
+        left_num if left_num >= 0 else "", left_cell_class, left_bg, left_content,
+        right_num if right_num >= 0 else "", right_cell_class, right_bg, right_content,
+    )
 
 
 def _generate_header(stats: Dict[str, int]) -> str:
@@ -413,15 +514,20 @@ def _generate_header(stats: Dict[str, int]) -> str:
     additions = stats.get("additions", 0)
     deletions = stats.get("deletions", 0)
 
-    return f"""
-        <div class="diff-header">
-            <span class="stats">
-                <span class="added">+{additions}</span>
-                &nbsp;
-                <span class="deleted">-{deletions}</span>
-            </span>
-        </div>
-    """
+    return (
+        f'<div class="diff-header"><span class="stats">'
+        f'<span class="added">+{additions}</span> &nbsp; '
+        f'<span class="deleted">-{deletions}</span></span></div>'
+    )
+
+
+def _generate_no_changes_document(header: str, view_class: str) -> str:
+    """Generate the document shown when the texts have no differences."""
+    return _generate_html_document(
+        f'{header}<div class="no-changes"><div class="no-changes-icon">&#10003;</div>'
+        f'<div>No differences found</div></div>',
+        view_class,
+    )
 
 
 def _generate_html_document(body_content: str, view_class: str) -> str:
@@ -435,76 +541,64 @@ def _generate_html_document(body_content: str, view_class: str) -> str:
     Returns:
         Complete HTML document string
     """
-    return f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    {DIFF_CSS}
-</head>
-<body>
-    <div class="diff-container {view_class}">
-        {body_content}
-    </div>
-</body>
-</html>"""
-
-
-def _get_row_class(change_type: str) -> str:
-    """Get the CSS class for a row based on change type."""
-    return {
-        "added": "line-added",
-        "deleted": "line-deleted",
-        "unchanged": "line-unchanged",
-    }.get(change_type, "")
-
-
-def _get_prefix(change_type: str) -> str:
-    """Get the prefix indicator for unified view."""
-    if change_type == "added":
-        return '<span class="prefix prefix-add">+</span>'
-    elif change_type == "deleted":
-        return '<span class="prefix prefix-del">-</span>'
-    return '<span class="prefix">&nbsp;</span>'
+    return _document_head(view_class) + body_content + _HTML_TAIL
+
+
+def _document_head(view_class: str) -> str:
+    """Get the document start up to and including the diff container opening tag."""
+    if view_class == "side-by-side":
+        return _HTML_HEAD_SBS
+    return _HTML_HEAD_UNIFIED
 
 
 def _format_content_with_char_diffs(
-    line: DiffLine,
-    for_deleted: bool = False,
-    for_added: bool = False
+    content: str,
+    change_type: int,
+    char_diffs: Optional[List[Tuple[str, str]]],
+    _escape_cache: Optional[Dict[int, str]] = None
 ) -> str:
     """
     Format line content with character-level highlighting.
 
     Args:
-        line: The DiffLine to format
-        for_deleted: If True, format for left side of side-by-side (show deletions only)
-        for_added: If True, format for right side of side-by-side (show additions only)
+        content: The raw line content
+        change_type: CHANGE_* code of the line
+        char_diffs: (change_type, text) pairs for the line, or None
+        _escape_cache: Escaped char-diff text keyed by id() of the source string,
+            shared across one formatting pass (paired lines share their char_diffs)
 
     Returns:
         HTML string with highlighted character differences
     """
-    content = line.content.rstrip("\n\r")
+    if not char_diffs:
+        return html.escape(content.rstrip("\n\r"))
 
-    if not line.char_diffs:
-        return html.escape(content)
+    if _escape_cache is None:
+        _escape_cache = {}
 
-    # Determine what to show based on context:
-    # - Side-by-side mode: for_deleted or for_added will be True
-    # - Unified mode: both are False, determine from line.change_type
-    # Each line should only show its own content (deleted lines show deletions, added lines show additions)
-    show_deletions = for_deleted or (not for_added and line.change_type == "deleted")
-    show_additions = for_added or (not for_deleted and line.change_type == "added")
+    # Each line only shows its own side: deleted lines show deletions,
+    # added lines show additions (the same content serves both views)
+    show_deletions = change_type == CHANGE_DELETED
+    show_additions = change_type == CHANGE_ADDED
 
     parts = []
-    for change_type, text in line.char_diffs:
-        escaped = html.escape(text.rstrip("\n\r"))
+    for diff_type, text in char_diffs:
+        # Skip insert on deleted lines, skip delete on added lines
+        if (diff_type == CHAR_DELETE and not show_deletions) or (
+            diff_type == CHAR_INSERT and not show_additions
+        ):
+            continue
+
+        key = id(text)
+        escaped = _escape_cache.get(key)
+        if escaped is None:
+            escaped = _escape_cache[key] = html.escape(text.rstrip("\n\r"))
 
-        if change_type == "equal":
+        if diff_type == CHAR_EQUAL:
             parts.append(escaped)
-        elif change_type == "delete" and show_deletions:
+        elif diff_type == CHAR_DELETE:
             parts.append(f'<span class="char-deleted">{escaped}</span>')
-        elif change_type == "insert" and show_additions:
+        elif diff_type == CHAR_INSERT:
             parts.append(f'<span class="char-added">{escaped}</span>')
-        # Skip insert on deleted lines, skip delete on added lines
 
     return "".join(parts)
@@ -0,0 +1,153 @@
+"""
+Myers O(ND) diff over sequences of integer ids.
+
+Produces difflib-compatible opcodes so it can stand in for
+SequenceMatcher.get_opcodes() on large inputs, where difflib's
+longest-match search degrades on files with many repeated lines.
+"""
+
+import itertools
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# (tag, i1, i2, j1, j2) as returned by difflib.SequenceMatcher.get_opcodes()
+Opcode = Tuple[str, int, int, int, int]
+
+
+def myers_opcodes(
+    a: Sequence[int], b: Sequence[int], max_edits: Optional[int] = None
+) -> Optional[List[Opcode]]:
+    """
+    Compute a minimal edit script between two id sequences as opcodes.
+
+    Args:
+        a: The original sequence (typically interned line ids)
+        b: The modified sequence
+        max_edits: Limit on the search depth D, which bounds the O((N+M)D)
+            search over the untrimmed middle section (None = no limit). A
+            middle section that is a pure insertion or deletion needs no
+            search and always succeeds.
+
+    Returns:
+        List of (tag, i1, i2, j1, j2) opcodes with tags 'equal', 'replace',
+        'delete' and 'insert', or None if the search exceeded max_edits
+    """
+    n, m = len(a), len(b)
+
+    # Trim the common prefix and suffix; Myers only needs the middle section
+    prefix, suffix = common_affixes(a, b)
+    blocks = _matching_blocks(a[prefix:n - suffix], b[prefix:m - suffix], max_edits)
+    if blocks is None:
+        return None
+
+    matches: List[Tuple[int, int, int]] = []
+    if prefix:
+        matches.append((0, 0, prefix))
+    matches.extend((i + prefix, j + prefix, size) for i, j, size in blocks)
+    if suffix:
+        matches.append((n - suffix, m - suffix, suffix))
+    return opcodes_from_blocks(matches, n, m)
+
+
+def common_affixes(a: Sequence[int], b: Sequence[int]) -> Tuple[int, int]:
+    """Return the lengths of the common prefix and (non-overlapping) common suffix."""
+    n, m = len(a), len(b)
+    prefix = 0
+    limit = min(n, m)
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and a[n - 1 - suffix] == b[m - 1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+
+def opcodes_from_blocks(
+    blocks: Iterable[Tuple[int, int, int]], n: int, m: int
+) -> List[Opcode]:
+    """
+    Convert matching blocks to opcodes, as SequenceMatcher.get_opcodes() does.
+
+    Args:
+        blocks: Ascending (i, j, size) runs of equal elements
+        n: Length of the original sequence
+        m: Length of the modified sequence
+
+    Returns:
+        List of (tag, i1, i2, j1, j2) opcodes covering both sequences
+    """
+    opcodes: List[Opcode] = []
+    i = j = 0
+    for ai, bj, size in itertools.chain(blocks, ((n, m, 0),)):
+        if i < ai and j < bj:
+            opcodes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            opcodes.append(("equal", ai, i, bj, j))
+    return opcodes
+
+
+def _matching_blocks(
+    a: Sequence[int], b: Sequence[int], max_edits: Optional[int]
+) -> Optional[List[Tuple[int, int, int]]]:
+    """
+    Run the greedy Myers search and backtrack to matching blocks.
+
+    Returns:
+        Ascending list of (i, j, size) runs of equal elements, or None if
+        the search depth exceeded max_edits
+    """
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        return []
+
+    max_d = n + m if max_edits is None else min(n + m, max_edits)
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    # trace[d] holds v[-d-1 .. d+1] as it was before step d
+    trace: List[List[int]] = []
+
+    for d in range(max_d + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+    return None
+
+
+def _backtrack(trace: List[List[int]], n: int, m: int) -> List[Tuple[int, int, int]]:
+    """Walk the search trace backwards, collecting the diagonal (equal) runs."""
+    blocks: List[Tuple[int, int, int]] = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        snapshot = trace[d]
+        base = d + 1  # snapshot index of diagonal k is k + d + 1
+        k = x - y
+        if k == -d or (k != d and snapshot[base + k - 1] < snapshot[base + k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = snapshot[base + prev_k]
+        prev_y = prev_x - prev_k
+
+        # The snake of step d starts right after the single edit from prev
+        start_x = prev_x if prev_k == k + 1 else prev_x + 1
+        if x > start_x:
+            size = x - start_x
+            blocks.append((start_x, y - size, size))
+        x, y = prev_x, prev_y
+    blocks.reverse()
+    return blocks